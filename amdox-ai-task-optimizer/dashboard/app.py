@@ -6,19 +6,50 @@ Privacy-first emotion detection and task recommendation system
 from flask import Flask, render_template, request, jsonify
 import sys
 import os
+import math
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import modules
 from src.text_emotion.predict import predict_text_emotion
-from src.facial_emotion.face_detect import capture_face_frame
-from src.facial_emotion.smile_detector import detect_smile_and_emotion
-from src.fusion.emotion_fusion import fuse_emotions
-from src.recommendations.task_recommender import recommend_task
+from src.facial_emotion.face_detect import capture_face_frame, capture_faces
+from src.facial_emotion.smile_detector import detect_smile_and_emotion, detect_emotions_batch
+from src.fusion.emotion_fusion import fuse_emotions, aggregate_room_emotions
+from src.recommendations.task_recommender import recommend_task, TASK_MAP
+from src.utils.deadline import Deadline
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
 
+# Total time budget for one /analyze request (override with ANALYZE_BUDGET_MS)
+app.config['ANALYZE_BUDGET_S'] = float(os.environ.get('ANALYZE_BUDGET_MS', 2000)) / 1000.0
+
+def request_budget(data):
+    """
+    Per-request time budget; clients may ask for less, never more
+    An invalid budget_ms is ignored and the configured budget is used
+    """
+    budget_s = app.config['ANALYZE_BUDGET_S']
+    if not data or data.get('budget_ms') is None:
+        return budget_s
+    try:
+        requested_s = float(data['budget_ms']) / 1000.0
+    except (TypeError, ValueError):
+        requested_s = math.nan
+    if not math.isfinite(requested_s):
+        print(f"⚠️ Ignoring invalid budget_ms: {data['budget_ms']!r}")
+        return budget_s
+    return max(0.0, min(budget_s, requested_s))
+
+def fallback_recommendation(emotion, confidence):
+    """Neutral-safe recommendation used when the recommend stage is skipped"""
+    return {
+        'emotion': emotion,
+        'confidence': confidence,
+        'recommendation_level': 'low',
+        'tasks': TASK_MAP['neutral']['moderate']
+    }
+
 @app.route('/')
 def index():
     """Serve the main page"""
@@ -31,48 +62,92 @@ def analyze_emotion():
         data = request.get_json()
         user_text = data.get('text', '').strip()
         use_face = data.get('use_face', False)
+
+        stages = ['text_emotion']
+        if use_face:
+            stages += ['capture', 'face_detect', 'face_emotion']
+        stages += ['fusion', 'recommend']
+        deadline = Deadline(request_budget(data), stages)
         
         # Text emotion analysis
         text_emotion, text_conf = "neutral", 0.0
         if user_text:
-            text_emotion, text_conf = predict_text_emotion(user_text)
+            text_emotion, text_conf = deadline.run(
+                'text_emotion', predict_text_emotion, user_text,
+                fallback=("neutral", 0.0)
+            )
             print(f"📝 Text emotion: {text_emotion} (confidence: {text_conf:.2f})")
+        else:
+            deadline.skip('text_emotion')
         
-        # Facial emotion analysis (simulated for production stability)
+        # Facial emotion analysis
         face_emotion, face_conf = "neutral", 0.0
         face_analysis_note = ""
         
         if use_face:
-            try:
-                print("🎥 Capturing face for analysis...")
-                face_img = capture_face_frame()
+            print("🎥 Capturing face for analysis...")
+            # Capture and detection share one call: frames are retried until
+            # a face is found (webcams start with dark frames) or time runs out
+            face_img = deadline.run(
+                ('capture', 'face_detect'), capture_face_frame, cooperative=True
+            )
+            
+            if face_img is not None:
+                print(f"✅ Face captured: shape={face_img.shape}")
                 
-                if face_img is not None:
-                    print(f"✅ Face captured: shape={face_img.shape}")
-                    
-                    # Use real smile detection (OpenCV-based, no TensorFlow)
-                    face_emotion, face_conf = detect_smile_and_emotion(face_img)
-                    face_analysis_note = f"Face detected and analyzed: {face_emotion} ({face_conf:.1%} confidence)"
-                    
-                    print(f"🎭 Face emotion result: {face_emotion} (confidence: {face_conf:.2f})")
-                else:
-                    face_analysis_note = "No face detected in camera frame"
-                    print("❌ No face detected")
+                # Use real smile detection (OpenCV-based, no TensorFlow)
+                face_emotion, face_conf = deadline.run(
+                    'face_emotion', detect_smile_and_emotion, face_img,
+                    fallback=("neutral", 0.0)
+                )
+                face_analysis_note = f"Face detected and analyzed: {face_emotion} ({face_conf:.1%} confidence)"
                 
-            except Exception as e:
-                face_analysis_note = f"Face analysis failed: {str(e)}"
-                print(f"❌ Face detection error: {e}")
+                print(f"🎭 Face emotion result: {face_emotion} (confidence: {face_conf:.2f})")
+            else:
+                deadline.skip('face_emotion')
+                face_analysis_note = "No face detected in camera frame"
+                print("❌ No face detected")
+
+            face_stages = ('capture', 'face_detect', 'face_emotion')
+            face_errors = deadline.stage_errors(face_stages)
+            face_degraded = [
+                stage for stage in face_stages
+                if stage in deadline.degraded_stages() and stage not in face_errors
+            ]
+            if face_errors:
+                # Stages run by one call (capture + face_detect) share an error
+                failed = {}
+                for stage, error in face_errors.items():
+                    failed.setdefault(error, []).append(stage)
+                face_analysis_note = "Face analysis failed: " + "; ".join(
+                    f"{', '.join(stages)}: {error}" for error, stages in failed.items()
+                )
+            elif face_degraded:
+                face_analysis_note = f"Face analysis degraded (time budget): {', '.join(face_degraded)}"
         
-        # Emotion fusion
+        # Emotion fusion (fallback: the more confident single modality)
         print(f"🔄 Fusion input: text=({text_emotion}, {text_conf:.2f}), face=({face_emotion}, {face_conf:.2f})")
-        final_emotion, final_conf = fuse_emotions(
+        fusion_fallback = max(
+            [(text_emotion, text_conf), (face_emotion, face_conf)],
+            key=lambda result: result[1]
+        )
+        final_emotion, final_conf = deadline.run_inline(
+            'fusion', fuse_emotions,
             (text_emotion, text_conf),
-            (face_emotion, face_conf)
+            (face_emotion, face_conf),
+            fallback=fusion_fallback
         )
         print(f"🎯 Fusion output: {final_emotion} (confidence: {final_conf:.2f})")
         
-        # Task recommendation
-        recommendation = recommend_task(final_emotion, final_conf)
+        # Task recommendation (fallback: neutral-safe, low-confidence tasks)
+        recommendation = deadline.run_inline(
+            'recommend', recommend_task, final_emotion, final_conf,
+            fallback=fallback_recommendation(final_emotion, final_conf)
+        )
+
+        timing = deadline.report()
+        if timing['degraded_stages']:
+            print(f"⏱️ Degraded stages: {', '.join(timing['degraded_stages'])}")
         
         # Prepare response
         response = {
@@ -86,7 +161,10 @@ def analyze_emotion():
             'recommendation_level': recommendation['recommendation_level'],
             'tasks': recommendation.get('tasks', []),
             'used_face': use_face,
-            'face_analysis_note': face_analysis_note
+            'face_analysis_note': face_analysis_note,
+            'degraded': bool(timing['degraded_stages']),
+            'degraded_stages': timing['degraded_stages'],
+            'timing': timing
         }
         
         print(f"📊 Final result: {final_emotion} ({final_conf:.2f})")
@@ -101,13 +179,111 @@ def analyze_emotion():
             'error': f'Analysis failed: {str(e)}'
         }), 500
 
+@app.route('/analyze_room', methods=['POST'])
+def analyze_room():
+    """Score every face in the camera frame (meeting rooms / shared cameras)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        deadline = Deadline(
+            request_budget(data),
+            ['capture', 'face_detect', 'face_emotion', 'fusion', 'recommend']
+        )
+
+        print("🎥 Capturing room frame for multi-face analysis...")
+        frame, gray, boxes = deadline.run(
+            ('capture', 'face_detect'), capture_faces,
+            fallback=(None, None, []), cooperative=True
+        )
+
+        if frame is None:
+            return jsonify({
+                'success': False,
+                'error': 'Camera not available',
+                'degraded_stages': deadline.degraded_stages(),
+                'timing': deadline.report()
+            })
+
+        # All faces scored in one batched pass over the frame
+        if boxes:
+            face_results = deadline.run(
+                'face_emotion', detect_emotions_batch, frame, boxes, gray=gray,
+                fallback=[("neutral", 0.0)] * len(boxes)
+            )
+        else:
+            deadline.skip('face_emotion')
+            face_results = []
+        print(f"👥 Faces analyzed: {len(face_results)}")
+
+        room_emotion, room_conf, distribution = deadline.run_inline(
+            'fusion', aggregate_room_emotions, face_results,
+            fallback=("neutral", 0.0, {})
+        )
+        recommendation = deadline.run_inline(
+            'recommend', recommend_task, room_emotion, room_conf,
+            fallback=fallback_recommendation(room_emotion, room_conf)
+        )
+        timing = deadline.report()
+
+        faces = [
+            {
+                'box': {'x': x, 'y': y, 'width': w, 'height': h},
+                'emotion': emotion,
+                'confidence': round(conf, 3)
+            }
+            for (x, y, w, h), (emotion, conf) in zip(boxes, face_results)
+        ]
+
+        print(f"📊 Room result: {room_emotion} ({room_conf:.2f})")
+        return jsonify({
+            'success': True,
+            'face_count': len(faces),
+            'faces': faces,
+            'room_emotion': recommendation['emotion'],
+            'room_confidence': round(recommendation['confidence'], 3),
+            'emotion_distribution': {
+                emotion: round(share, 3) for emotion, share in distribution.items()
+            },
+            'recommendation_level': recommendation['recommendation_level'],
+            'tasks': recommendation.get('tasks', []),
+            'degraded': bool(timing['degraded_stages']),
+            'degraded_stages': timing['degraded_stages'],
+            'timing': timing
+        })
+
+    except Exception as e:
+        print(f"❌ Room analysis error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Room analysis failed: {str(e)}'
+        }), 500
+
 @app.route('/test_camera')
 def test_camera():
     """Test camera access endpoint"""
     try:
-        face_img = capture_face_frame()
+        # Bounded like /analyze so a slow camera cannot hold the request
+        deadline = Deadline(app.config['ANALYZE_BUDGET_S'], ['capture', 'face_detect'])
+        face_img = deadline.run(
+            ('capture', 'face_detect'), capture_face_frame, cooperative=True
+        )
         
-        if face_img is not None:
+        timing = deadline.report()
+        stage = timing['stages']['capture']
+        if stage['status'] == 'error':
+            return jsonify({
+                'success': False,
+                'message': f"Camera test failed: {stage['error']}",
+                'timing': timing
+            })
+        elif timing['degraded_stages']:
+            return jsonify({
+                'success': False,
+                'message': 'Camera test timed out',
+                'timing': timing
+            })
+        elif face_img is not None:
             return jsonify({
                 'success': True,
                 'message': 'Camera working, face detected',
@@ -0,0 +1,476 @@
+"""
+Load-testing harness for the AI Task Optimizer dashboard
+Drives /analyze, /analyze_room, /health and /test_camera with N concurrent simulated users
+and reports throughput/latency curves and saturation points
+
+Run from the project root (models are loaded from relative paths):
+
+    python3 dashboard/load_test.py --users 1,2,4,8,16 --duration 10
+    python3 dashboard/load_test.py --mode server --frames data/frames
+    python3 dashboard/load_test.py --url http://127.0.0.1:8080
+
+Modes:
+- inprocess: requests go through Flask's test client (no network)
+- server:    a local threaded server is started on a free port
+- --url:     an already running server is targeted (its real camera is used)
+
+In inprocess/server mode the webcam is replaced by RecordedCamera, which
+replays frames from --frames (images or .npy files) through the real face
+detector, so no camera is needed and runs are reproducible. Without --frames
+synthetic noise frames are used; they contain no faces, so the face
+scenarios never reach emotion detection (reported as "synthetic").
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.facial_emotion.face_detect import detect_faces, extract_face
+
+
+# Short workplace check-ins, roughly what users type into the dashboard
+TEXT_SAMPLES = [
+    "I am so happy and excited today!",
+    "I feel really sad and depressed",
+    "This makes me so angry and frustrated",
+    "I am worried and anxious about tomorrow",
+    "Everything is fine and normal",
+    "Too many deadlines this week, I can't keep up",
+    "Great meeting with the team, feeling productive",
+    "Tired after a long day of back-to-back calls",
+    "Not sure what to work on next",
+    "The release went smoothly, really relieved",
+]
+
+# Request mix as (scenario, weight); weights need not sum to 1
+DEFAULT_MIX = [
+    ("analyze_text", 0.60),
+    ("analyze_text_face", 0.25),
+    ("health", 0.10),
+    ("test_camera", 0.05),
+    ("analyze_room", 0.05),
+]
+
+# Scenario -> (method, path, uses_face)
+SCENARIOS = {
+    "analyze_text": ("POST", "/analyze", False),
+    "analyze_text_face": ("POST", "/analyze", True),
+    "health": ("GET", "/health", False),
+    "test_camera": ("GET", "/test_camera", False),
+    "analyze_room": ("POST", "/analyze_room", True),
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class RecordedCamera:
+    """
+    Stand-in for capture_face_frame that replays recorded frames
+    Frames cycle in order and go through the real face detector
+    """
+
+    def __init__(self, frames, synthetic=False):
+        if not frames:
+            raise ValueError("RecordedCamera needs at least one frame")
+        self.frames = frames
+        self.is_synthetic = synthetic
+        self._index = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, path):
+        """Load every image / .npy file in a directory (sorted by name)"""
+        frames = []
+        for name in sorted(os.listdir(path)):
+            full_path = os.path.join(path, name)
+            lower = name.lower()
+            if lower.endswith(".npy"):
+                frames.append(np.load(full_path))
+            elif lower.endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(full_path)
+                if frame is not None:
+                    frames.append(frame)
+        if not frames:
+            raise ValueError(f"No frames found in {path}")
+        return cls(frames)
+
+    @classmethod
+    def synthetic(cls, count=4, width=640, height=480, seed=0):
+        """Noise frames with the camera's resolution (no face will be found)"""
+        rng = np.random.default_rng(seed)
+        frames = [
+            rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+            for _ in range(count)
+        ]
+        return cls(frames, synthetic=True)
+
+    def describe(self):
+        if self.is_synthetic:
+            return f"synthetic ({len(self.frames)} noise frames, no faces)"
+        return f"recorded ({len(self.frames)} frames)"
+
+    def next_frame(self):
+        with self._lock:
+            frame = self.frames[self._index]
+            self._index = (self._index + 1) % len(self.frames)
+        return frame
+
+    def capture_face_frame(self, stop_at=None):
+        return extract_face(self.next_frame())
+
+    def capture_faces(self, stop_at=None):
+        frame = self.next_frame()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame, gray, detect_faces(frame, gray)
+
+
+def install_camera_stand_in(app_module, camera):
+    """Route the dashboard's camera calls to the recorded camera"""
+    app_module.capture_face_frame = camera.capture_face_frame
+    app_module.capture_faces = camera.capture_faces
+
+
+class InProcessClient:
+    """Sends requests through Flask's test client (one per user thread)"""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, payload=None):
+        if method == "POST":
+            response = self.client.post(path, json=payload)
+        else:
+            response = self.client.get(path)
+        return response.status_code
+
+
+class HttpClient:
+    """Sends real HTTP requests to a running server"""
+
+    def __init__(self, base_url, timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method, path, payload=None):
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        req = urllib.request.Request(
+            self.base_url + path, data=data, headers=headers, method=method
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def build_payload(scenario, rng):
+    method, path, uses_face = SCENARIOS[scenario]
+    if method != "POST":
+        return None
+    if path == "/analyze_room":
+        return {}
+    return {"text": rng.choice(TEXT_SAMPLES), "use_face": uses_face}
+
+
+def simulate_user(client, mix, deadline, seed):
+    """Issue requests back-to-back until the deadline; returns samples"""
+    rng = random.Random(seed)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples = []
+
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights=weights)[0]
+        method, path, _ = SCENARIOS[scenario]
+        payload = build_payload(scenario, rng)
+
+        start = time.perf_counter()
+        try:
+            status = client.request(method, path, payload)
+            ok = 200 <= status < 300
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - start
+
+        samples.append((scenario, latency, ok))
+
+    return samples
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    return float(np.percentile(values, q))
+
+
+def summarize(samples, elapsed):
+    """Latency stats (ms) and throughput (req/s) for a list of samples"""
+    latencies = [latency * 1000.0 for _, latency, _ in samples]
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(float(np.mean(latencies)), 2) if latencies else None,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "max_ms": _round(max(latencies) if latencies else None),
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def run_level(client_factory, users, duration, mix, seed):
+    """Run one concurrency level and return its per-endpoint summary"""
+    clients = [client_factory() for _ in range(users)]
+    start = time.perf_counter()
+    deadline = start + duration
+
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        futures = [
+            pool.submit(simulate_user, clients[i], mix, deadline, seed + i)
+            for i in range(users)
+        ]
+        samples = [s for future in futures for s in future.result()]
+
+    elapsed = time.perf_counter() - start
+
+    by_scenario = {}
+    for scenario in SCENARIOS:
+        scenario_samples = [s for s in samples if s[0] == scenario]
+        if scenario_samples:
+            by_scenario[scenario] = summarize(scenario_samples, elapsed)
+
+    analyze_samples = [s for s in samples if SCENARIOS[s[0]][1] == "/analyze"]
+
+    return {
+        "users": users,
+        "duration_s": round(elapsed, 2),
+        "overall": summarize(samples, elapsed),
+        "analyze": summarize(analyze_samples, elapsed),
+        "scenarios": by_scenario,
+    }
+
+
+def find_saturation(levels, p99_budget_ms, min_gain=0.10):
+    """
+    Locate saturation points across concurrency levels
+    - latency: first level where /analyze p99 exceeds the budget
+    - throughput: first level where adding users raised throughput < min_gain
+    """
+    latency_point = None
+    throughput_point = None
+    best_level = None
+
+    for i, level in enumerate(levels):
+        p99 = level["analyze"]["p99_ms"]
+        if latency_point is None and p99 is not None and p99 > p99_budget_ms:
+            latency_point = level["users"]
+
+        if throughput_point is None and i > 0:
+            previous = levels[i - 1]["overall"]["throughput_rps"]
+            current = level["overall"]["throughput_rps"]
+            if previous > 0 and (current - previous) / previous < min_gain:
+                throughput_point = level["users"]
+
+        within_budget = p99 is not None and p99 <= p99_budget_ms
+        if within_budget and level["overall"]["error_rate"] == 0:
+            best_level = level["users"]
+
+    return {
+        "p99_budget_ms": p99_budget_ms,
+        "latency_saturation_users": latency_point,
+        "throughput_saturation_users": throughput_point,
+        "max_users_within_budget": best_level,
+    }
+
+
+def format_report(result):
+    """Plain-text report of the throughput/latency curve"""
+    lines = [
+        "AI Task Optimizer - Load Test Report",
+        "=" * 72,
+        f"Target: {result['target']}",
+        f"Camera: {result['camera']}",
+        f"Duration per level: {result['duration_per_level_s']}s",
+        "",
+        f"{'users':>6} {'req/s':>9} {'errors':>7} "
+        f"{'analyze p50':>12} {'p95':>9} {'p99':>9} {'max':>9}",
+        "-" * 72,
+    ]
+
+    for level in result["levels"]:
+        overall = level["overall"]
+        analyze = level["analyze"]
+        lines.append(
+            f"{level['users']:>6} {overall['throughput_rps']:>9.2f} "
+            f"{overall['errors']:>7} "
+            f"{_fmt_ms(analyze['p50_ms']):>12} {_fmt_ms(analyze['p95_ms']):>9} "
+            f"{_fmt_ms(analyze['p99_ms']):>9} {_fmt_ms(analyze['max_ms']):>9}"
+        )
+
+    saturation = result["saturation"]
+    lines += [
+        "",
+        f"/analyze p99 budget: {saturation['p99_budget_ms']:.0f} ms",
+        f"Latency saturation at: {_fmt_users(saturation['latency_saturation_users'])}",
+        f"Throughput plateau at: {_fmt_users(saturation['throughput_saturation_users'])}",
+        f"Max users within budget: {_fmt_users(saturation['max_users_within_budget'])}",
+    ]
+    return "\n".join(lines)
+
+
+def _fmt_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _fmt_users(value):
+    return "not reached" if value is None else f"{value} users"
+
+
+def start_local_server(flask_app, host="127.0.0.1"):
+    """Start a threaded server on a free port; returns (server, base_url)"""
+    from werkzeug.serving import make_server
+
+    server = make_server(host, 0, flask_app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def parse_mix(face_ratio):
+    """Default mix with the text+frame share of /analyze set to face_ratio"""
+    analyze_share = DEFAULT_MIX[0][1] + DEFAULT_MIX[1][1]
+    return [
+        ("analyze_text", analyze_share * (1 - face_ratio)),
+        ("analyze_text_face", analyze_share * face_ratio),
+    ] + DEFAULT_MIX[2:]
+
+
+def run_load_test(users_levels, duration, mix, mode="inprocess", url=None,
+                  camera=None, p99_budget_ms=500.0, seed=42):
+    """Run every concurrency level and return the full result dict"""
+    server = None
+
+    if url:
+        target = url
+        camera_note = "server camera"
+        client_factory = lambda: HttpClient(url)
+    else:
+        import app as dashboard_app
+
+        if camera is None:
+            print("⚠️ No --frames given: using synthetic noise frames. No face will "
+                  "be found, so face scenarios skip smile detection and their "
+                  "latency is understated.")
+            camera = RecordedCamera.synthetic()
+        install_camera_stand_in(dashboard_app, camera)
+        camera_note = camera.describe()
+
+        if mode == "server":
+            server, base_url = start_local_server(dashboard_app.app)
+            target = base_url
+            client_factory = lambda: HttpClient(base_url)
+        else:
+            target = "in-process (Flask test client)"
+            client_factory = lambda: InProcessClient(dashboard_app.app)
+
+    try:
+        # Warm up (model loading, cascades, first-request setup)
+        warmup_client = client_factory()
+        for scenario in SCENARIOS:
+            method, path, _ = SCENARIOS[scenario]
+            warmup_client.request(method, path, build_payload(scenario, random.Random(seed)))
+
+        levels = []
+        for users in users_levels:
+            print(f"⏱️  Running {users} concurrent users for {duration}s...")
+            level = run_level(client_factory, users, duration, mix, seed)
+            levels.append(level)
+            print(
+                f"   {level['overall']['throughput_rps']:.2f} req/s, "
+                f"/analyze p99 {_fmt_ms(level['analyze']['p99_ms'])} ms"
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    return {
+        "target": target,
+        "camera": camera_note,
+        "duration_per_level_s": duration,
+        "mix": dict(mix),
+        "levels": levels,
+        "saturation": find_saturation(levels, p99_budget_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard")
+    parser.add_argument("--users", default="1,2,4,8,16",
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="seconds per concurrency level")
+    parser.add_argument("--mode", choices=["inprocess", "server"], default="inprocess")
+    parser.add_argument("--url", help="target an already running server instead")
+    parser.add_argument("--frames", help="directory of recorded frames (images or .npy)")
+    parser.add_argument("--face-ratio", type=float, default=0.3,
+                        help="share of /analyze requests that include a frame")
+    parser.add_argument("--p99-budget-ms", type=float, default=500.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default="load_test_results.json",
+                        help="where to write the JSON results")
+    parser.add_argument("--report", help="also write the text report to this file")
+    args = parser.parse_args()
+
+    users_levels = [int(u) for u in args.users.split(",") if u.strip()]
+    camera = RecordedCamera.from_directory(args.frames) if args.frames else None
+
+    result = run_load_test(
+        users_levels,
+        args.duration,
+        parse_mix(args.face_ratio),
+        mode=args.mode,
+        url=args.url,
+        camera=camera,
+        p99_budget_ms=args.p99_budget_ms,
+        seed=args.seed,
+    )
+
+    with open(args.json, "w") as f:
+        json.dump(result, f, indent=2)
+
+    report = format_report(result)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(report + "\n")
+
+    print()
+    print(report)
+    print(f"\n📊 JSON results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
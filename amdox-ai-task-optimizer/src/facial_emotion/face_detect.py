@@ -1,69 +1,180 @@
 import cv2
+import threading
 import time
 
+FACE_CASCADE_PATH = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
 # Load Haar Cascade once
-FACE_CASCADE = cv2.CascadeClassifier(
-    cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-)
+FACE_CASCADE = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+
+# CascadeClassifier is not safe to share between threads (the dashboard
+# serves requests concurrently), so each worker thread loads its own copy
+_thread_local = threading.local()
+
+
+def get_face_cascade():
+    """Return the calling thread's face cascade"""
+    cascade = getattr(_thread_local, "face_cascade", None)
+    if cascade is None:
+        if threading.current_thread() is threading.main_thread():
+            cascade = FACE_CASCADE
+        else:
+            cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+        _thread_local.face_cascade = cascade
+    return cascade
+
+
+# Try multiple detection parameters for better results
+DETECTION_PARAMS = [
+    {'scaleFactor': 1.1, 'minNeighbors': 3, 'minSize': (30, 30)},
+    {'scaleFactor': 1.2, 'minNeighbors': 4, 'minSize': (50, 50)},
+    {'scaleFactor': 1.3, 'minNeighbors': 5, 'minSize': (30, 30)},
+]
+
+# Padding (pixels) added around each detected face
+FACE_PADDING = 20
 
-def capture_face_frame():
+
+def detect_face_boxes(gray):
     """
-    Capture face from camera with improved detection parameters
+    Run the face cascade on a grayscale frame
+    Returns the (x, y, w, h) boxes from the first parameter set that finds any
     """
-    cap = cv2.VideoCapture(0)
-    
-    if not cap.isOpened():
+    cascade = get_face_cascade()
+
+    for params in DETECTION_PARAMS:
+        faces = cascade.detectMultiScale(
+            gray,
+            scaleFactor=params['scaleFactor'],
+            minNeighbors=params['minNeighbors'],
+            minSize=params['minSize']
+        )
+
+        if len(faces) > 0:
+            return [tuple(int(v) for v in face) for face in faces]
+
+    return []
+
+
+def pad_box(box, frame_shape):
+    """Add some padding around a face box, clipped to the frame"""
+    x, y, w, h = box
+    x = max(0, x - FACE_PADDING)
+    y = max(0, y - FACE_PADDING)
+    w = min(frame_shape[1] - x, w + 2 * FACE_PADDING)
+    h = min(frame_shape[0] - y, h + 2 * FACE_PADDING)
+    return x, y, w, h
+
+
+def extract_face(frame):
+    """
+    Detect the largest face in a BGR frame and return the padded crop
+    Returns None when no face is found
+    """
+    # Convert to grayscale
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = detect_face_boxes(gray)
+
+    if not faces:
         return None
-    
-    # Set camera properties for better quality
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    
-    # Try multiple frames to increase detection chance
-    max_attempts = 5
-    
-    for attempt in range(max_attempts):
-        ret, frame = cap.read()
-        
-        if not ret:
-            continue
-            
-        # Convert to grayscale
+
+    # Found face! Get the largest one
+    largest_face = max(faces, key=lambda face: face[2] * face[3])
+    x, y, w, h = pad_box(largest_face, frame.shape)
+
+    return frame[y:y+h, x:x+w]
+
+
+def detect_faces(frame, gray=None):
+    """
+    Detect every face in a BGR frame
+    Returns padded (x, y, w, h) boxes, left to right
+    """
+    if gray is None:
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Try multiple detection parameters for better results
-        detection_params = [
-            {'scaleFactor': 1.1, 'minNeighbors': 3, 'minSize': (30, 30)},
-            {'scaleFactor': 1.2, 'minNeighbors': 4, 'minSize': (50, 50)},
-            {'scaleFactor': 1.3, 'minNeighbors': 5, 'minSize': (30, 30)},
-        ]
-        
-        for params in detection_params:
-            faces = FACE_CASCADE.detectMultiScale(
-                gray,
-                scaleFactor=params['scaleFactor'],
-                minNeighbors=params['minNeighbors'],
-                minSize=params['minSize']
-            )
-            
-            if len(faces) > 0:
-                # Found face! Get the largest one
-                largest_face = max(faces, key=lambda face: face[2] * face[3])
-                x, y, w, h = largest_face
-                
-                # Add some padding around the face
-                padding = 20
-                x = max(0, x - padding)
-                y = max(0, y - padding)
-                w = min(frame.shape[1] - x, w + 2 * padding)
-                h = min(frame.shape[0] - y, h + 2 * padding)
-                
-                face_img = frame[y:y+h, x:x+w]
-                cap.release()
+    boxes = [pad_box(face, frame.shape) for face in detect_face_boxes(gray)]
+    return sorted(boxes)
+
+
+def crop_faces(frame, boxes):
+    """Face crops as views into the frame buffer (no copies)"""
+    return [frame[y:y+h, x:x+w] for (x, y, w, h) in boxes]
+
+
+def _time_left(stop_at):
+    if stop_at is None:
+        return None
+    return stop_at - time.perf_counter()
+
+
+def read_frames(stop_at=None, max_attempts=5):
+    """
+    Open the camera and yield frames until max_attempts reads are used up
+    stop_at: optional time.perf_counter() deadline; no read or delay starts
+    after it. The camera is released when the generator is closed
+    """
+    cap = cv2.VideoCapture(0)
+
+    try:
+        if not cap.isOpened():
+            return
+
+        # Set camera properties for better quality
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+
+        for attempt in range(max_attempts):
+            left = _time_left(stop_at)
+            if left is not None and left <= 0:
+                return
+
+            ret, frame = cap.read()
+
+            if not ret:
+                continue
+
+            yield frame
+
+            # Small delay before the next attempt, never past the deadline
+            if attempt < max_attempts - 1:
+                left = _time_left(stop_at)
+                time.sleep(0.1 if left is None else min(0.1, max(0.0, left)))
+    finally:
+        cap.release()
+
+
+def capture_face_frame(stop_at=None):
+    """
+    Capture face from camera with improved detection parameters
+    Tries several frames (webcams often start with dark warm-up frames)
+    until a face is found, the attempts run out or stop_at is reached
+    """
+    frames = read_frames(stop_at)
+    try:
+        for frame in frames:
+            face_img = extract_face(frame)
+            if face_img is not None:
                 return face_img
-        
-        # Small delay between attempts
-        time.sleep(0.1)
-    
-    cap.release()
-    return None
+        return None
+    finally:
+        frames.close()
+
+
+def capture_faces(stop_at=None):
+    """
+    Capture a frame and detect every face in it (multi-face mode)
+    Retries like capture_face_frame until at least one face is found
+    Returns (frame, gray, boxes); frame is None if the camera could not be read
+    """
+    last_frame, last_gray = None, None
+    frames = read_frames(stop_at)
+    try:
+        for frame in frames:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            last_frame, last_gray = frame, gray
+            boxes = detect_faces(frame, gray)
+            if boxes:
+                return frame, gray, boxes
+        return last_frame, last_gray, []
+    finally:
+        frames.close()
@@ -4,8 +4,168 @@ No TensorFlow, no mutex issues, actual facial feature analysis
 """
 
 import cv2
+import threading
 import numpy as np
 
+from src.facial_emotion.face_detect import crop_faces
+
+SMILE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_smile.xml'
+EYE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_eye.xml'
+
+# Cascades and CLAHE are loaded once per thread (not per face / per call);
+# CascadeClassifier is not safe to share between threads
+_thread_local = threading.local()
+
+
+def get_detectors():
+    """Return the calling thread's (smile_cascade, eye_cascade, clahe)"""
+    detectors = getattr(_thread_local, "detectors", None)
+    if detectors is None:
+        detectors = (
+            cv2.CascadeClassifier(SMILE_CASCADE_PATH),
+            cv2.CascadeClassifier(EYE_CASCADE_PATH),
+            cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)),
+        )
+        _thread_local.detectors = detectors
+    return detectors
+
+
+def extract_features(gray, detectors):
+    """
+    Measure facial features on one grayscale face crop
+    gray may be a view into a larger frame; it is not modified
+    """
+    smile_cascade, eye_cascade, clahe = detectors
+
+    # Enhance contrast for better detection
+    gray = clahe.apply(gray)
+    height, width = gray.shape
+    face_area = height * width
+    
+    # Detect smiles with STRICT parameters to reduce false positives
+    smiles = smile_cascade.detectMultiScale(
+        gray,
+        scaleFactor=1.7,
+        minNeighbors=22,  # Higher = fewer false positives
+        minSize=(25, 25)
+    )
+    
+    # Detect eyes
+    eyes = eye_cascade.detectMultiScale(
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(20, 20)
+    )
+    
+    # Additional validation: Smile should be in bottom 40% of face
+    smiles = [
+        (sx, sy, sw, sh)
+        for (sx, sy, sw, sh) in smiles
+        if sy > height * 0.6
+    ]
+    
+    # Analyze brightness and contrast
+    brightness = np.mean(gray)
+    contrast = np.std(gray)
+    
+    # Analyze edge density (angry/stressed faces have more edges/tension)
+    edges = cv2.Canny(gray, 50, 150)
+    edge_density = np.count_nonzero(edges) / face_area
+    
+    # Analyze vertical gradients (frowns have strong downward patterns)
+    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+    gradient_intensity = np.mean(np.abs(sobely))
+    
+    # SMILE STRENGTH based on size and position
+    smile_strength = 0.0
+    for (sx, sy, sw, sh) in smiles:
+        smile_ratio = (sw * sh) / face_area
+        smile_strength = max(smile_strength, smile_ratio * 100)
+    
+    # EYE ANALYSIS
+    eye_brightness = 0.0
+    if len(eyes) >= 2:
+        for (ex, ey, ew, eh) in eyes[:2]:
+            eye_brightness += np.mean(gray[ey:ey+eh, ex:ex+ew])
+        eye_brightness /= 2
+    
+    return {
+        "smiles": len(smiles),
+        "smile_strength": smile_strength,
+        "eyes": len(eyes),
+        "eye_brightness": eye_brightness,
+        "brightness": brightness,
+        "contrast": contrast,
+        "edge_density": edge_density,
+        "gradient_intensity": gradient_intensity,
+    }
+
+
+def classify_emotion(features):
+    """
+    Rule-based emotion classification from extract_features output
+    Returns: (emotion, confidence)
+    """
+    smile_detected = features["smiles"] > 0
+    smile_strength = features["smile_strength"]
+    eye_brightness = features["eye_brightness"]
+    brightness = features["brightness"]
+    contrast = features["contrast"]
+    edge_density = features["edge_density"]
+    gradient_intensity = features["gradient_intensity"]
+
+    # EMOTION CLASSIFICATION
+    emotion = "neutral"
+    confidence = 0.5
+    
+    # ANGRY/STRESSED: High edge density + high gradient (tense face)
+    if edge_density > 0.15 and gradient_intensity > 15:
+        if contrast > 60:
+            emotion = "angry"
+            confidence = 0.70
+        else:
+            emotion = "stressed"
+            confidence = 0.68
+    
+    # HAPPY: Strong smile detected AND not high tension
+    elif smile_strength > 0.4 and edge_density < 0.15:
+        emotion = "happy"
+        confidence = min(0.75 + (smile_strength / 8), 0.92)
+    
+    # HAPPY: Moderate smile with bright eyes AND low tension
+    elif smile_strength > 0.15 and eye_brightness > 100 and edge_density < 0.12:
+        emotion = "happy"
+        confidence = 0.68
+    
+    # ANGRY: High tension, low brightness, no smile
+    elif edge_density > 0.12 and brightness < 100 and not smile_detected:
+        emotion = "angry"
+        confidence = 0.65
+    
+    # STRESSED: High tension with moderate brightness
+    elif edge_density > 0.13 and brightness > 100:
+        emotion = "stressed"
+        confidence = 0.62
+    
+    # SAD: Low brightness, low contrast, low tension (flat/down expression)
+    elif brightness < 95 and contrast < 50 and edge_density < 0.10:
+        emotion = "sad"
+        confidence = 0.60
+    
+    # HAPPY: Weak smile but very bright face (likely smiling)
+    elif smile_strength > 0.05 and brightness > 135 and edge_density < 0.10:
+        emotion = "happy"
+        confidence = 0.62
+    
+    # NEUTRAL: Default case
+    else:
+        emotion = "neutral"
+        confidence = 0.55
+
+    return emotion, confidence
+
+
 def detect_smile_and_emotion(face_img):
     """
     Detect smile and emotion using OpenCV facial features
@@ -21,143 +181,20 @@ def detect_smile_and_emotion(face_img):
         return "neutral", 0.0
     
     try:
-        # Load cascades
-        smile_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_smile.xml'
-        )
-        eye_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_eye.xml'
-        )
-        
         # Convert to grayscale
         gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-        
-        # Enhance contrast for better detection
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        gray = clahe.apply(gray)
-        
-        # Detect smiles with STRICT parameters to reduce false positives
-        smiles = smile_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.7,
-            minNeighbors=22,  # Higher = fewer false positives
-            minSize=(25, 25)
-        )
-        
-        # Detect eyes
-        eyes = eye_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(20, 20)
-        )
-        
-        # Additional validation: Check if detected "smile" is in lower face region
-        valid_smiles = []
-        for (sx, sy, sw, sh) in smiles:
-            # Smile should be in bottom 40% of face
-            if sy > height * 0.6:
-                valid_smiles.append((sx, sy, sw, sh))
-        
-        smiles = valid_smiles
-        
-        # Analyze brightness and contrast
-        brightness = np.mean(gray)
-        contrast = np.std(gray)
-        
-        # Calculate face metrics
-        height, width = gray.shape
-        face_area = height * width
-        
-        # Analyze edge density (angry/stressed faces have more edges/tension)
-        edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / face_area
-        
-        # Analyze vertical gradients (frowns have strong downward patterns)
-        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        gradient_intensity = np.mean(np.abs(sobely))
-        
-        # SMILE DETECTION LOGIC
-        smile_detected = len(smiles) > 0
-        smile_strength = 0.0
-        
-        if smile_detected:
-            # Calculate smile strength based on size and position
-            for (sx, sy, sw, sh) in smiles:
-                smile_area = sw * sh
-                smile_ratio = smile_area / face_area
-                
-                # Smiles in lower half of face are more reliable
-                if sy > height * 0.5:
-                    smile_strength = max(smile_strength, smile_ratio * 100)
-        
-        # EYE ANALYSIS
-        eyes_open = len(eyes) >= 2
-        eye_brightness = 0.0
-        
-        if eyes_open:
-            for (ex, ey, ew, eh) in eyes[:2]:
-                eye_region = gray[ey:ey+eh, ex:ex+ew]
-                eye_brightness += np.mean(eye_region)
-            eye_brightness /= min(len(eyes), 2)
-        
-        # EMOTION CLASSIFICATION
-        emotion = "neutral"
-        confidence = 0.5
-        
-        # ANGRY/STRESSED: High edge density + high gradient (tense face)
-        if edge_density > 0.15 and gradient_intensity > 15:
-            if contrast > 60:
-                emotion = "angry"
-                confidence = 0.70
-            else:
-                emotion = "stressed"
-                confidence = 0.68
-        
-        # HAPPY: Strong smile detected AND not high tension
-        elif smile_strength > 0.4 and edge_density < 0.15:
-            emotion = "happy"
-            confidence = min(0.75 + (smile_strength / 8), 0.92)
-        
-        # HAPPY: Moderate smile with bright eyes AND low tension
-        elif smile_strength > 0.15 and eye_brightness > 100 and edge_density < 0.12:
-            emotion = "happy"
-            confidence = 0.68
-        
-        # ANGRY: High tension, low brightness, no smile
-        elif edge_density > 0.12 and brightness < 100 and not smile_detected:
-            emotion = "angry"
-            confidence = 0.65
-        
-        # STRESSED: High tension with moderate brightness
-        elif edge_density > 0.13 and brightness > 100:
-            emotion = "stressed"
-            confidence = 0.62
-        
-        # SAD: Low brightness, low contrast, low tension (flat/down expression)
-        elif brightness < 95 and contrast < 50 and edge_density < 0.10:
-            emotion = "sad"
-            confidence = 0.60
-        
-        # HAPPY: Weak smile but very bright face (likely smiling)
-        elif smile_strength > 0.05 and brightness > 135 and edge_density < 0.10:
-            emotion = "happy"
-            confidence = 0.62
-        
-        # NEUTRAL: Default case
-        else:
-            emotion = "neutral"
-            confidence = 0.55
+
+        features = extract_features(gray, get_detectors())
+        emotion, confidence = classify_emotion(features)
         
         print(f"🔍 Smile Analysis:")
-        print(f"   - Smiles detected: {len(smiles)}")
-        print(f"   - Smile strength: {smile_strength:.2f}")
-        print(f"   - Eyes detected: {len(eyes)}")
-        print(f"   - Brightness: {brightness:.1f}")
-        print(f"   - Contrast: {contrast:.1f}")
-        print(f"   - Edge density: {edge_density:.3f} (tension)")
-        print(f"   - Gradient: {gradient_intensity:.1f}")
+        print(f"   - Smiles detected: {features['smiles']}")
+        print(f"   - Smile strength: {features['smile_strength']:.2f}")
+        print(f"   - Eyes detected: {features['eyes']}")
+        print(f"   - Brightness: {features['brightness']:.1f}")
+        print(f"   - Contrast: {features['contrast']:.1f}")
+        print(f"   - Edge density: {features['edge_density']:.3f} (tension)")
+        print(f"   - Gradient: {features['gradient_intensity']:.1f}")
         print(f"   - Result: {emotion} ({confidence:.2%})")
         
         return emotion, confidence
@@ -165,3 +202,30 @@ def detect_smile_and_emotion(face_img):
     except Exception as e:
         print(f"❌ Smile detection error: {e}")
         return "neutral", 0.5
+
+
+def detect_emotions_batch(frame, boxes, gray=None):
+    """
+    Detect emotions for every face in a frame in one pass
+    Grayscale conversion and detector setup happen once per frame (pass the
+    gray frame from capture_faces to skip it), and each face is analysed on
+    a view into the grayscale buffer (no crop copies)
+    Returns: list of (emotion, confidence) in box order
+    """
+    if frame is None or not boxes:
+        return []
+
+    if gray is None:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    detectors = get_detectors()
+
+    results = []
+    for face_gray in crop_faces(gray, boxes):
+        try:
+            features = extract_features(face_gray, detectors)
+            results.append(classify_emotion(features))
+        except Exception as e:
+            print(f"❌ Smile detection error: {e}")
+            results.append(("neutral", 0.5))
+
+    return results
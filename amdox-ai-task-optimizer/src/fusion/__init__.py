@@ -1 +1 @@
-from .emotion_fusion import fuse_emotions
+from .emotion_fusion import fuse_emotions, aggregate_room_emotions
@@ -1,4 +1,4 @@
-from src.utils.label_mapping import PRIORITY_ORDER
+from src.utils.label_mapping import FINAL_EMOTION_CLASSES, PRIORITY_ORDER
 
 def fuse_emotions(text_result, face_result):
     text_emotion, text_conf = text_result
@@ -30,4 +30,28 @@ def fuse_emotions(text_result, face_result):
         return face_emotion, face_conf
     else:
         return text_emotion, text_conf
-    
\ No newline at end of file
+    
+
+def aggregate_room_emotions(face_results):
+    """
+    Combine per-face (emotion, confidence) results into a room-level view
+    Returns: (dominant_emotion, confidence, distribution)
+    """
+    distribution = {emotion: 0.0 for emotion in FINAL_EMOTION_CLASSES}
+    total_conf = sum(conf for _, conf in face_results)
+
+    if total_conf <= 0:
+        return "neutral", 0.0, distribution
+
+    # Confidence-weighted share of each emotion across faces
+    for emotion, conf in face_results:
+        distribution[emotion] = distribution.get(emotion, 0.0) + conf / total_conf
+
+    # Ties go to the higher-priority (safety-first) emotion
+    dominant = max(PRIORITY_ORDER, key=lambda emotion: distribution.get(emotion, 0.0))
+
+    # Confidence = mean confidence of the faces showing the dominant emotion
+    dominant_confs = [conf for emotion, conf in face_results if emotion == dominant]
+    confidence = sum(dominant_confs) / len(dominant_confs)
+
+    return dominant, confidence, distribution
@@ -0,0 +1,174 @@
+"""
+Benchmark for the shared text normalization pipeline
+- throughput (texts/sec) of normalize.py vs the original NLTK clean_text
+- agreement between the two outputs
+- model accuracy on the held-out split (same split as train.py), on raw
+  text when data/raw is available so training/serving skew shows up
+
+Run from the project root:
+
+    python3 src/text_emotion/benchmark_normalize.py
+"""
+
+import os
+import re
+import sys
+import time
+
+import joblib
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.text_emotion.normalize import NORMALIZER_PATH, load_normalizer
+from src.utils.label_mapping import TEXT_TO_FINAL
+
+DATA_PATH = "data/processed/text_emotion_processed.csv"
+RAW_DATA_PATH = "data/raw/text_emotion.csv"
+MODEL_PATH = "models/text_model.pkl"
+VECTOR_PATH = "models/vectorizer.pkl"
+
+
+def load_held_out_split():
+    # Same split as train.py; the index keeps each row's position in the CSV
+    df = pd.read_csv(DATA_PATH)
+    df.dropna(subset = ['clean_text', 'label'], inplace = True)
+    X = df['clean_text'].astype(str)
+    y = df['label']
+    _, X_test, _, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    return X_test, list(y_test)
+
+
+def load_raw_held_out(held_out_index):
+    # Raw text for the held-out rows. The processed CSV holds the raw rows
+    # that got a label, in order (see preprocess_dataset)
+    if not os.path.exists(RAW_DATA_PATH):
+        return None
+    try:
+        from src.text_emotion.preprocess import get_dominant_emotion
+    except Exception as e:
+        print(f"⚠️ Cannot map raw labels, skipping raw accuracy: {e}")
+        return None
+
+    raw = pd.read_csv(RAW_DATA_PATH)
+    emotion_columns = [col for col in raw.columns if col in TEXT_TO_FINAL]
+    labels = raw.apply(lambda row: get_dominant_emotion(row, emotion_columns), axis = 1)
+    raw = raw[labels.notna()].reset_index(drop = True)
+
+    if len(raw) != len(pd.read_csv(DATA_PATH)):
+        print("⚠️ Raw and processed data do not line up, skipping raw accuracy")
+        return None
+    return raw.loc[held_out_index, "text"].astype(str).tolist()
+
+
+def load_benchmark_texts(held_out_texts):
+    # Raw text exercises URL/character filtering; fall back to held-out text
+    if os.path.exists(RAW_DATA_PATH):
+        return pd.read_csv(RAW_DATA_PATH)["text"].astype(str).tolist(), "raw dataset"
+    return held_out_texts, "held-out split"
+
+
+def measure_throughput(normalize, texts, min_seconds=1.0):
+    # Repeat full passes until min_seconds has elapsed; returns texts/sec
+    processed = 0
+    start = time.perf_counter()
+    while True:
+        for text in texts:
+            normalize(text)
+        processed += len(texts)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return processed / elapsed
+
+
+def load_nltk_clean_text():
+    # Baseline: the original clean_text (regex calls per text, WordNet per
+    # token). NLTK is a training-time dependency only; skip it if missing
+    try:
+        from src.text_emotion.preprocess import lemmatizer, stop_words
+    except Exception as e:
+        print(f"⚠️ NLTK pipeline unavailable, skipping comparison: {e}")
+        return None
+
+    def clean_text(text):
+        text = text.lower()
+        text = re.sub(r"http\S+", "", text)
+        text = re.sub(r"[^a-z\s]", "", text)
+        return " ".join(
+            lemmatizer.lemmatize(word)
+            for word in text.split()
+            if word not in stop_words
+        )
+
+    clean_text("warm up wordnet")
+    return clean_text
+
+
+def load_or_build_normalizer(training_texts):
+    # Prefer the exported table; otherwise build the same one in-process
+    normalizer = load_normalizer(NORMALIZER_PATH)
+    if normalizer is not None:
+        return normalizer, "exported"
+    try:
+        from src.text_emotion.preprocess import build_text_normalizer
+        words = {word for text in training_texts for word in text.split()}
+        return build_text_normalizer(words), "built in-process (NLTK)"
+    except Exception as e:
+        print(f"❌ Cannot build the normalizer without NLTK data: {e}")
+        return None, None
+
+
+def run_benchmark():
+    held_out, held_out_labels = load_held_out_split()
+    held_out_texts = list(held_out)
+    texts, source = load_benchmark_texts(held_out_texts)
+
+    df = pd.read_csv(DATA_PATH)
+    normalizer, origin = load_or_build_normalizer(df['clean_text'].dropna().astype(str))
+    if normalizer is None:
+        return
+
+    print(f"Normalizer: {origin}")
+    print(f"Benchmark texts: {len(texts)} ({source})")
+
+    fast_rate = measure_throughput(normalizer.normalize, texts)
+    print(f"normalize.py : {fast_rate:,.0f} texts/sec")
+
+    clean_text = load_nltk_clean_text()
+    if clean_text is not None:
+        nltk_rate = measure_throughput(clean_text, texts)
+        print(f"NLTK clean_text: {nltk_rate:,.0f} texts/sec "
+              f"({fast_rate / nltk_rate:.1f}x speed-up)")
+
+        matches = sum(normalizer.normalize(t) == clean_text(t) for t in texts)
+        print(f"Output agreement: {matches / len(texts):.2%}")
+
+    model = joblib.load(MODEL_PATH)
+    vectorizer = joblib.load(VECTOR_PATH)
+
+    def accuracy(texts):
+        return accuracy_score(held_out_labels, model.predict(vectorizer.transform(texts)))
+
+    print(f"Held-out accuracy (training text): {accuracy(held_out_texts):.4f}")
+
+    raw_texts = load_raw_held_out(held_out.index)
+    if raw_texts is not None:
+        # Serving sees raw text: compare the old path with the shared normalizer
+        normalized = [normalizer.normalize(t) for t in raw_texts]
+        print(f"Held-out accuracy (raw text, no normalization): {accuracy(raw_texts):.4f}")
+        print(f"Held-out accuracy (raw text, normalize.py): {accuracy(normalized):.4f}")
+    else:
+        # Without raw data this only shows normalization is idempotent on
+        # already-cleaned text; it cannot detect skew on raw input
+        normalized = [normalizer.normalize(t) for t in held_out_texts]
+        print(f"Held-out accuracy (training text re-normalized, idempotency "
+              f"check only - no raw held-out text): {accuracy(normalized):.4f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,117 @@
+"""
+Text normalization shared by training and inference
+Lowercasing, URL removal, character filtering, stopword removal and
+lemmatization with no NLTK dependency at serving time
+
+The stopword set and lemma dictionary are exported at training time
+(see train.py) and loaded here from a JSON file.
+"""
+
+import json
+import os
+import re
+
+NORMALIZER_PATH = "models/text_normalizer.json"
+
+# Precompiled patterns (same rules as the original clean_text)
+URL_PATTERN = re.compile(r"http\S+")
+ASCII_URL_PATTERN = re.compile(r"http\S+", re.IGNORECASE)
+NON_ALPHA_PATTERN = re.compile(r"[^a-z\s]")
+
+
+def _build_ascii_filter_table():
+    # One str.translate pass: uppercase -> lowercase, keep a-z and
+    # whitespace, drop every other ASCII character
+    table = {}
+    for code in range(128):
+        char = chr(code)
+        if "A" <= char <= "Z":
+            table[code] = char.lower()
+        elif not ("a" <= char <= "z" or char.isspace()):
+            table[code] = None
+    return str.maketrans(table)
+
+
+ASCII_FILTER_TABLE = _build_ascii_filter_table()
+
+
+def filter_characters(text):
+    """Lowercase, strip URLs and drop everything except a-z and whitespace"""
+    if text.isascii():
+        # Fast path: for ASCII input, matching "http" case-insensitively on
+        # the original text is the same as matching it after lowercasing
+        text = ASCII_URL_PATTERN.sub("", text)
+        return text.translate(ASCII_FILTER_TABLE)
+
+    text = text.lower()
+    text = URL_PATTERN.sub("", text)
+    return NON_ALPHA_PATTERN.sub("", text)
+
+
+class TextNormalizer:
+    """
+    Stopword removal + dictionary lemmatization on top of filter_characters
+    lemmatize: optional fallback for words missing from the dictionary
+    (training uses WordNet here; results are cached into the dictionary)
+    """
+
+    def __init__(self, stop_words, lemmas=None, lemmatize=None):
+        self.stop_words = frozenset(stop_words)
+        self.lemmas = dict(lemmas or {})
+        self.lemmatize = lemmatize
+
+    def normalize(self, text):
+        tokens = filter_characters(text).split()
+        stop_words = self.stop_words
+        lemmas = self.lemmas
+
+        if self.lemmatize is None:
+            return " ".join(
+                lemmas.get(word, word)
+                for word in tokens
+                if word not in stop_words
+            )
+
+        result = []
+        for word in tokens:
+            if word in stop_words:
+                continue
+            lemma = lemmas.get(word)
+            if lemma is None:
+                lemma = lemmas[word] = self.lemmatize(word)
+            result.append(lemma)
+        return " ".join(result)
+
+    __call__ = normalize
+
+    def save(self, path=NORMALIZER_PATH):
+        """Export stopwords and non-trivial lemmas (word -> lemma) as JSON"""
+        data = {
+            "stop_words": sorted(self.stop_words),
+            "lemmas": {
+                word: lemma
+                for word, lemma in sorted(self.lemmas.items())
+                if word != lemma
+            },
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path=NORMALIZER_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["stop_words"], data["lemmas"])
+
+
+def load_normalizer(path=NORMALIZER_PATH):
+    """
+    Load the exported normalizer
+    Returns None if it has not been exported yet
+    (python3 src/text_emotion/train.py --export-normalizer)
+    """
+    if os.path.exists(path):
+        return TextNormalizer.load(path)
+    print(f"⚠️ {path} not found, run train.py --export-normalizer "
+          "(text is vectorized without normalization until then)")
+    return None
@@ -1,6 +1,8 @@
 import numpy as np
 import joblib
 
+from src.text_emotion.normalize import NORMALIZER_PATH, load_normalizer
+
 # Paths 
 MODEL_PATH =  "models/text_model.pkl"
 VECTOR_PATH = "models/vectorizer.pkl"
@@ -8,6 +10,7 @@ VECTOR_PATH = "models/vectorizer.pkl"
 # Load model and Tf-idf Vectorizer 
 model = joblib.load(MODEL_PATH)
 vectorizer = joblib.load(VECTOR_PATH)
+normalizer = load_normalizer(NORMALIZER_PATH)
 
 def predict_text_emotion(text):
     # Predicts the confidence and emotion from input text 
@@ -17,6 +20,11 @@ def predict_text_emotion(text):
     if not text or not isinstance (text, str):
         return "neutral",0.0
 
+    # Same normalization as the training data (see preprocess.clean_text),
+    # once the normalizer has been exported by train.py
+    if normalizer is not None:
+        text = normalizer.normalize(text)
+
     text_vector = vectorizer.transform([text])
 
     probabilities = model.predict_proba(text_vector)[0]
@@ -1,9 +1,9 @@
-import re
 import nltk
 import pandas as pd
-from nltk.corpus import stopwords
+from nltk.corpus import stopwords, wordnet
 from nltk.stem import WordNetLemmatizer 
 from src.utils.label_mapping import TEXT_TO_FINAL, PRIORITY_ORDER
+from src.text_emotion.normalize import TextNormalizer
 
 nltk.download('stopwords')
 nltk.download('wordnet')
@@ -11,17 +11,46 @@ nltk.download('wordnet')
 stop_words = set(stopwords.words('english'))
 lemmatizer = WordNetLemmatizer()
 
+# Same pipeline as serving; words missing from the lemma table go to WordNet
+normalizer = TextNormalizer(stop_words, lemmatize=lemmatizer.lemmatize)
+
+# Inverse of WordNet's noun suffix rules (lemma ending -> inflected ending)
+NOUN_INFLECTIONS = [
+    ("", "s"), ("s", "ses"), ("x", "xes"), ("z", "zes"),
+    ("ch", "ches"), ("sh", "shes"), ("man", "men"), ("y", "ies"),
+]
+
 def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"http\S+", "", text)
-    text  =re.sub(r"[^a-z\s]", "" , text)
-    tokens = text.split()                 # Tokenization
-    tokens = [                            # Lemmatization and Stopword Removal(Remove high freq meaningless words)
-        lemmatizer.lemmatize(word)
-        for word in tokens
-        if word not in stop_words
+    # Lowercasing, URL/character filtering, stopword removal and lemmatization
+    return normalizer.normalize(text)
+
+def inflected_forms(word):
+    # Candidate surface forms that WordNet could lemmatize back to word
+    return [
+        word[:len(word) - len(ending)] + suffix
+        for ending, suffix in NOUN_INFLECTIONS
+        if word.endswith(ending)
     ]
-    return " ".join(tokens)
+
+def irregular_noun_forms():
+    # Inflected forms listed in WordNet's noun exception file (noun.exc),
+    # read through the corpus reader's public open()
+    with wordnet.open("noun.exc") as f:
+        return [line.split()[0] for line in f if line.strip()]
+
+def build_text_normalizer(words):
+    # Precompute lemmas for the given words, their regular plural forms and
+    # WordNet's irregular noun forms, so serving needs no NLTK lookups
+    lemmas = {}
+    candidates = set(words)
+    for word in words:
+        candidates.update(inflected_forms(word))
+    candidates.update(irregular_noun_forms())
+
+    for word in candidates:
+        if word.isalpha() and word.islower() and word not in stop_words:
+            lemmas[word] = lemmatizer.lemmatize(word)
+    return TextNormalizer(stop_words, lemmas)
 
 def get_dominant_emotion(row, emotion_columns):
     active_emotions = [ e for e in emotion_columns if row[e] == 1]
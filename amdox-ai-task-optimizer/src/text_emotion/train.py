@@ -1,3 +1,5 @@
+import os
+import sys
 import pandas as pd 
 import joblib
 
@@ -6,6 +8,12 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.text_emotion.normalize import NORMALIZER_PATH
+from src.text_emotion.preprocess import build_text_normalizer
+
 
 ''' ----------------- PATH ------------------'''
 DATA_PATH = "data/processed/text_emotion_processed.csv"
@@ -13,6 +21,19 @@ MODEL_PATH = "models/text_model.pkl"
 VECTOR_PATH = "models/vectorizer.pkl"
 
 
+def export_text_normalizer(X=None):
+    # Export stopwords + lemma table so serving normalizes text like training.
+    # Only needs the processed data, so the saved model is left untouched
+    if X is None:
+        df = pd.read_csv(DATA_PATH)
+        df.dropna(subset = ['clean_text', 'label'], inplace = True)
+        X = df['clean_text'].astype(str)
+
+    corpus_words = {word for text in X for word in text.split()}
+    build_text_normalizer(corpus_words).save(NORMALIZER_PATH)
+    print("Text normalizer exported to", NORMALIZER_PATH)
+
+
 def train_test_emotion_model():
     df = pd.read_csv(DATA_PATH)
 
@@ -59,7 +80,13 @@ def train_test_emotion_model():
     joblib.dump(model, MODEL_PATH)
     joblib.dump(vectorizer, VECTOR_PATH)
 
+    export_text_normalizer(X)
+
     print("\n Text emotion model trained and saved successfully!")
 
 if __name__ == "__main__": 
-    train_test_emotion_model()
\ No newline at end of file
+    # --export-normalizer: rebuild models/text_normalizer.json without retraining
+    if "--export-normalizer" in sys.argv[1:]:
+        export_text_normalizer()
+    else:
+        train_test_emotion_model()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Per-request deadline for the analysis pipeline
+Each stage gets a share of the remaining budget; a stage that runs out of
+time is abandoned (or skipped if no time is left) and its fallback is used
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Relative share of the total budget per stage
+STAGE_SHARES = {
+    "capture": 0.35,
+    "face_detect": 0.20,
+    "face_emotion": 0.20,
+    "text_emotion": 0.15,
+    "fusion": 0.05,
+    "recommend": 0.05,
+}
+
+# Below this a stage is not worth starting
+MIN_STAGE_BUDGET_S = 0.005
+
+# Stage statuses; only SKIPPED/TIMEOUT/ERROR count as degraded
+# (OVER_BUDGET: an inline stage finished late, its result is still used)
+OK = "ok"
+NOT_NEEDED = "not_needed"
+OVER_BUDGET = "over_budget"
+SKIPPED = "skipped"
+TIMEOUT = "timeout"
+ERROR = "error"
+DEGRADED_STATUSES = (SKIPPED, TIMEOUT, ERROR)
+
+# Stages run in a pool so a stuck call can be abandoned. Abandoned work
+# keeps its worker until it returns, so camera stages get their own pool
+# (hung cameras cannot starve text/face analysis) and should also stop
+# cooperatively (see Deadline.run's cooperative flag)
+CAPTURE_STAGES = ("capture",)
+CAPTURE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="capture")
+STAGE_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="stage")
+
+
+class Deadline:
+    """
+    Budget tracker for one request
+    budget_s: total time for all stages
+    stages: stages planned for this request, in run order
+    """
+
+    def __init__(self, budget_s, stages, shares=STAGE_SHARES):
+        self.budget_s = budget_s
+        self.start = time.perf_counter()
+        self.shares = shares
+        self.pending = list(stages)
+        self.results = {}
+
+    def remaining(self):
+        return max(0.0, self.budget_s - (time.perf_counter() - self.start))
+
+    def stage_budget(self, stage):
+        """Share of the remaining time, split over the stages still to run"""
+        pending_shares = sum(self.shares[s] for s in self.pending)
+        if pending_shares <= 0:
+            return self.remaining()
+        return self.remaining() * self.shares[stage] / pending_shares
+
+    def _start(self, stages):
+        # Budget for one call covering the given stages
+        budget = sum(self.stage_budget(s) for s in stages)
+        for s in stages:
+            if s in self.pending:
+                self.pending.remove(s)
+        return budget
+
+    def run(self, stage, fn, *args, fallback=None, cooperative=False, **kwargs):
+        """
+        Run fn in a worker within the stage's budget and return its result
+        Returns fallback if the stage is skipped, times out or raises
+        stage may be a tuple of stages done by one call (e.g. capture and
+        face_detect in capture_face_frame); their budgets are combined
+        cooperative=True passes the absolute stage deadline
+        (time.perf_counter) to fn as stop_at so it can stop on its own
+        """
+        stages = stage if isinstance(stage, tuple) else (stage,)
+        budget = self._start(stages)
+
+        if budget < MIN_STAGE_BUDGET_S:
+            self._record(stages, SKIPPED, 0.0, budget)
+            return fallback
+
+        started = time.perf_counter()
+        if cooperative:
+            kwargs["stop_at"] = started + budget
+
+        in_capture = any(s in CAPTURE_STAGES for s in stages)
+        executor = CAPTURE_EXECUTOR if in_capture else STAGE_EXECUTOR
+        future = executor.submit(fn, *args, **kwargs)
+
+        error = None
+        try:
+            result = future.result(timeout=budget)
+            status = OK
+        except TimeoutError:
+            future.cancel()
+            result, status = fallback, TIMEOUT
+        except Exception as e:
+            print(f"❌ Stage '{stage}' failed: {e}")
+            result, status, error = fallback, ERROR, str(e)
+
+        self._record(stages, status, time.perf_counter() - started, budget, error)
+        return result
+
+    def run_inline(self, stage, fn, *args, fallback=None, **kwargs):
+        """
+        Run a fast stage in the calling thread (no pool hand-off)
+        It is skipped if no time is left; the budget is checked afterwards
+        """
+        stages = (stage,)
+        budget = self._start(stages)
+
+        if budget < MIN_STAGE_BUDGET_S:
+            self._record(stages, SKIPPED, 0.0, budget)
+            return fallback
+
+        started = time.perf_counter()
+        error = None
+        try:
+            result = fn(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            status = OK if elapsed <= budget else OVER_BUDGET
+        except Exception as e:
+            print(f"❌ Stage '{stage}' failed: {e}")
+            result, status, error = fallback, ERROR, str(e)
+
+        self._record(stages, status, time.perf_counter() - started, budget, error)
+        return result
+
+    def skip(self, stage):
+        """Drop a planned stage that has no input (not counted as degraded)"""
+        if stage in self.pending:
+            self.pending.remove(stage)
+        self._record((stage,), NOT_NEEDED, 0.0, 0.0)
+
+    def _record(self, stages, status, elapsed, budget, error=None):
+        for stage in stages:
+            self.results[stage] = {
+                "status": status,
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "budget_ms": round(budget * 1000, 1),
+            }
+            if error is not None:
+                self.results[stage]["error"] = error
+
+    def degraded_stages(self):
+        return [
+            stage for stage, result in self.results.items()
+            if result["status"] in DEGRADED_STATUSES
+        ]
+
+    def stage_errors(self, stages=None):
+        """Error message per stage that raised (optionally only the given stages)"""
+        return {
+            stage: result["error"]
+            for stage, result in self.results.items()
+            if result["status"] == ERROR and (stages is None or stage in stages)
+        }
+
+    def report(self):
+        return {
+            "budget_ms": round(self.budget_s * 1000, 1),
+            "elapsed_ms": round((time.perf_counter() - self.start) * 1000, 1),
+            "degraded_stages": self.degraded_stages(),
+            "stages": self.results,
+        }